@@ -1,95 +1,446 @@
 import os
 import csv
-import json
+import hashlib
+import shutil
+import tempfile
+import threading
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import boto3
-from io import StringIO
+from boto3.s3.transfer import TransferConfig
+from io import SEEK_CUR, SEEK_END, SEEK_SET, BytesIO, RawIOBase, StringIO, TextIOWrapper
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
 
+# Options forwarded to pyarrow's Parquet writer for every Parquet save
+PARQUET_WRITE_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 3,
+    'row_group_size': 500_000,
+    'use_dictionary': True,
+}
+
+# orjson options for JSON saves; non-str keys are stringified, as json.dumps does
+JSON_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Rows parsed per chunk by FileProvider.retrieve_file_iter
+CSV_CHUNK_SIZE = 100_000
+
+# Worker threads used by FileProvider.save_files/retrieve_files against S3
+BATCH_MAX_WORKERS = 16
+
+# Multipart/concurrent transfer settings used for all S3 uploads and downloads
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    max_concurrency=10,
+    multipart_chunksize=8 * 1024 * 1024,
+    io_chunksize=1024 * 1024,
+    use_threads=True,
+)
+
+# Connection pool shared by all clients created below, sized so that a full save_files/retrieve_files
+# batch (every worker running a transfer at full concurrency) never has to wait for a connection
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=BATCH_MAX_WORKERS * S3_TRANSFER_CONFIG.max_concurrency,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+)
+
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+def _get_s3_client(region):
+    """
+    Return the shared S3 client for a region, creating it on first use.
+
+    boto3 clients are thread-safe, so a single client (and its connection pool) is reused
+    by every FileProvider targeting the same region.
+
+    :param region: AWS region name (may be None for the default region)
+    :return: boto3 S3 client
+    """
+    client = _s3_clients.get(region)
+    if client is None:
+        with _s3_clients_lock:
+            client = _s3_clients.get(region)
+            if client is None:
+                client = boto3.client('s3', region_name=region, config=S3_CLIENT_CONFIG)
+                _s3_clients[region] = client
+    return client
+
+_thread_local = threading.local()
+
+def _thread_buffer():
+    """
+    Return this thread's reusable serialization buffer, positioned at the start.
+
+    The buffer is not truncated here: truncating a BytesIO to zero releases its memory, so callers
+    write their payload first and then call truncate() to drop whatever is left of the previous one.
+    Keeping the allocation across calls avoids regrowing a large buffer for every upload.
+
+    :return: BytesIO buffer owned by the calling thread
+    """
+    buffer = getattr(_thread_local, 'buffer', None)
+    if buffer is None:
+        buffer = _thread_local.buffer = BytesIO()
+    buffer.seek(0)
+    return buffer
+
+def _is_plain_csv_type(column_type):
+    """Return whether pyarrow's CSV writer formats a column type the same way the csv module does."""
+    return (pa.types.is_integer(column_type) or pa.types.is_string(column_type)
+            or pa.types.is_large_string(column_type) or pa.types.is_null(column_type))
+
 class FileFormat(Enum):
     """Enumeration of supported file formats."""
     CSV = auto()
     PARQUET = auto()
     JSON = auto()
 
+# File extension and local open() arguments for each format, computed once at import
+FILE_EXTENSIONS = {file_format: file_format.name.lower() for file_format in FileFormat}
+_LOCAL_WRITE_MODES = {FileFormat.CSV: 'wb', FileFormat.JSON: 'wb'}
+# CSV is written as UTF-8 bytes; the csv module needs newline='' to keep quoted newlines intact
+_LOCAL_READ_OPTIONS = {
+    FileFormat.CSV: {'mode': 'r', 'encoding': 'utf-8', 'newline': ''},
+    FileFormat.JSON: {'mode': 'rb'},
+}
+
+# Names of the FileProvider methods converting between records and file content, looked up on the
+# instance so subclasses can override them; Parquet saves call _data_to_parquet directly (with a schema)
+_ENCODERS = {FileFormat.CSV: '_data_to_csv', FileFormat.JSON: '_data_to_json'}
+_DECODERS = {FileFormat.CSV: '_csv_to_data', FileFormat.PARQUET: '_parquet_to_data', FileFormat.JSON: '_json_to_data'}
+
+class _S3ObjectFile(RawIOBase):
+    """
+    Read-only, seekable file over an S3 object that fetches each read with a ranged GET.
+
+    Used for Parquet reads with column/row filters, so that only the footer and the required
+    column chunks are transferred instead of the whole object.
+    """
+
+    def __init__(self, s3, bucket, key):
+        """
+        :param s3: boto3 S3 client
+        :param bucket: Bucket of the object
+        :param key: Key of the object
+        """
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._size = s3.head_object(Bucket=bucket, Key=key)['ContentLength']
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=SEEK_SET):
+        if whence == SEEK_SET:
+            self._position = offset
+        elif whence == SEEK_CUR:
+            self._position += offset
+        elif whence == SEEK_END:
+            self._position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._position
+
+    def read(self, size=-1):
+        end = self._size if size is None or size < 0 else min(self._position + size, self._size)
+        if end <= self._position:
+            return b''
+        response = self._s3.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={self._position}-{end - 1}")
+        data = response['Body'].read()
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
 class FileProvider:
     """
     A class for handling file operations (save, update, retrieve) with support for local storage and Amazon S3.
     Supports CSV, Parquet, and JSON file formats.
     """
 
-    def __init__(self, s3_config=None, local_directory='data'):
+    def __init__(self, s3_config=None, local_directory='data', use_pandas=False, cache_directory=None):
         """
         Initialize the FileProvider.
         
         :param s3_config: Dictionary containing S3 configuration (bucket, key, region)
         :param local_directory: Local directory for file storage if not using S3
+        :param use_pandas: Read and write CSV through pandas (with type inference) instead of the csv module
+        :param cache_directory: Local directory for caching S3 downloads, validated by ETag (disabled if None)
         """
         self.s3_config = s3_config
         self.local_directory = local_directory
+        self.use_pandas = use_pandas
+        self.cache_directory = cache_directory
+        self._schemas = {}
+        self._hashes = {}
+        self._appended = set()
 
         if self.s3_config:
-            self.s3 = boto3.client('s3', region_name=self.s3_config.get('region'))
+            self.s3 = _get_s3_client(self.s3_config.get('region'))
+            if self.cache_directory:
+                os.makedirs(self.cache_directory, exist_ok=True)
         else:
             os.makedirs(self.local_directory, exist_ok=True)
 
-    def save_file(self, file_name, data, file_format: FileFormat):
+    def save_file(self, file_name, data, file_format: FileFormat, schema=None):
         """
         Save data to a file in the specified format.
+
+        A pyarrow schema given for a Parquet file is used instead of per-call type inference and is
+        remembered for that file name. Later saves and appends without a schema reuse it; a save whose
+        records do not fit it (new fields, or values it cannot hold) infers the types instead and
+        forgets the schema, as does forget_schema. Records with keys that are not in a given schema
+        raise ValueError rather than losing those values.
         
         :param file_name: Name of the file to save
         :param data: Data to be saved
         :param file_format: Format of the file (FileFormat enum)
+        :param schema: pyarrow Schema of the records (Parquet only)
         """
         self._validate_file_format(file_format)
+        self._hashes.pop((file_name, file_format), None)
+        self._save_content(file_name, self._encode(file_name, data, file_format, schema), file_format)
 
-        if file_format == FileFormat.CSV:
-            content = self._data_to_csv(data)
-        elif file_format == FileFormat.PARQUET:
-            content = self._data_to_parquet(data)
-        elif file_format == FileFormat.JSON:
-            content = self._data_to_json(data)
+    def update_file(self, file_name, data, file_format: FileFormat, append=False, schema=None):
+        """
+        Update an existing file with new data. By default, this method simply overwrites the file.
 
-        if self.s3_config:
-            self._save_to_s3(file_name, content, file_format)
-        else:
-            self._save_to_local(file_name, content, file_format)
+        An overwrite is skipped when the content is identical to what the last update_file call wrote
+        to the same file through this provider (compared by a hash of the encoded CSV or JSON bytes,
+        or of the records and the table schema for Parquet).
 
-    def update_file(self, file_name, data, file_format: FileFormat):
-        """
-        Update an existing file with new data. Currently, this method simply overwrites the file.
+        With append=True (Parquet only) the new records are written as a separate part file next to
+        the existing file instead of rewriting it, and retrieve_file returns the file followed by all
+        appended parts. Without a given or remembered schema, appended records are cast to the schema
+        of the existing file; records that do not fit it raise ValueError. On S3, parts are found with
+        a LIST request (which needs s3:ListBucket), so saves and reads of a Parquet file only look for
+        parts once this provider has appended to it; other providers see just the file itself.
         
         :param file_name: Name of the file to update
         :param data: New data to be saved
         :param file_format: Format of the file (FileFormat enum)
+        :param append: Append data to the existing Parquet file instead of overwriting it
+        :param schema: pyarrow Schema of the records (Parquet only), see save_file
         """
         self._validate_file_format(file_format)
+        if not append:
+            # Otherwise an update is the same as a save
+            content = self._encode(file_name, data, file_format, schema)
+            digest = self._content_digest(data, content, file_format)
+            if digest is not None and self._hashes.get((file_name, file_format)) == digest:
+                return
+            self._hashes.pop((file_name, file_format), None)
+            self._save_content(file_name, content, file_format)
+            if digest is not None:
+                self._hashes[(file_name, file_format)] = digest
+            return
+
+        if file_format is not FileFormat.PARQUET:
+            raise ValueError(f"Appending is not supported for file format: {file_format}")
+
+        self._hashes.pop((file_name, file_format), None)
+
+        schema = self._resolve_schema(file_name, schema)
+        if self.s3_config:
+            self._append_parquet_to_s3(file_name, data, schema)
+        else:
+            self._append_parquet_to_local(file_name, data, schema)
+
+    def forget_schema(self, file_name):
+        """
+        Forget the schema remembered for a Parquet file, so that later saves infer types again.
 
-        # For simplicity, update is the same as save
-        self.save_file(file_name, data, file_format)
+        :param file_name: Name of the file
+        """
+        self._schemas.pop(file_name, None)
 
-    def retrieve_file(self, file_name, file_format: FileFormat):
+    def retrieve_file(self, file_name, file_format: FileFormat, columns=None, filters=None):
         """
         Retrieve data from a file in the specified format.
+
+        For Parquet files, columns and filters are pushed down to pyarrow so that only the requested
+        columns, and only row groups that can match the filters, are read. On S3 (without a cache
+        directory) this is done with ranged GETs, transferring just the needed parts of the object.
         
         :param file_name: Name of the file to retrieve
         :param file_format: Format of the file (FileFormat enum)
+        :param columns: Names of the columns to read (Parquet only)
+        :param filters: Row filters in pyarrow.parquet.read_table syntax, e.g. [('age', '>', 30)] (Parquet only)
         :return: Data from the file
         """
         self._validate_file_format(file_format)
+        if (columns is not None or filters is not None) and file_format is not FileFormat.PARQUET:
+            raise ValueError(f"Column and row filters are not supported for file format: {file_format}")
 
         if self.s3_config:
-            content = self._retrieve_from_s3(file_name, file_format)
+            content = self._retrieve_from_s3(file_name, file_format, columns, filters)
         else:
-            content = self._retrieve_from_local(file_name, file_format)
+            content = self._retrieve_from_local(file_name, file_format, columns, filters)
+
+        return getattr(self, _DECODERS[file_format])(content)
+
+    def retrieve_file_iter(self, file_name, file_format: FileFormat, chunk_size=CSV_CHUNK_SIZE):
+        """
+        Retrieve data from a file as an iterator of records.
+
+        Unlike retrieve_file, CSV files are parsed row by row (or in chunks of chunk_size rows
+        with use_pandas) and local Parquet files are read one batch at a time, so only one chunk
+        is held as Python records at once. JSON files are loaded in full and then iterated.
+
+        :param file_name: Name of the file to retrieve
+        :param file_format: Format of the file (FileFormat enum)
+        :param chunk_size: Number of rows parsed per chunk (pandas CSV and Parquet only)
+        :return: Iterator over the records in the file
+        """
+        self._validate_file_format(file_format)
+        return self._iter_records(file_name, file_format, chunk_size)
+
+    def _iter_records(self, file_name, file_format: FileFormat, chunk_size):
+        """
+        Yield the records of a file for retrieve_file_iter, once the format has been validated.
+
+        :param file_name: Name of the file to retrieve
+        :param file_format: Format of the file (FileFormat enum)
+        :param chunk_size: Number of rows parsed per chunk (pandas CSV and Parquet only)
+        """
+        if file_format is FileFormat.CSV and not self.use_pandas:
+            if self.s3_config:
+                yield from csv.DictReader(TextIOWrapper(self._retrieve_from_s3(file_name, file_format), encoding='utf-8', newline=''))
+            else:
+                with open(self._local_path(file_name, file_format), **_LOCAL_READ_OPTIONS[file_format]) as f:
+                    yield from csv.DictReader(f)
+        elif file_format is FileFormat.CSV:
+            if self.s3_config:
+                reader = pd.read_csv(self._retrieve_from_s3(file_name, file_format), chunksize=chunk_size, engine='c')
+            else:
+                reader = pd.read_csv(self._local_path(file_name, file_format), chunksize=chunk_size, engine='c', memory_map=True)
+            with reader:
+                for chunk in reader:
+                    yield from chunk.to_dict('records')
+        elif file_format is FileFormat.PARQUET and not self.s3_config:
+            for file_path in [self._local_path(file_name, file_format)] + self._local_parquet_parts(file_name):
+                for batch in pq.ParquetFile(file_path, memory_map=True).iter_batches(batch_size=chunk_size):
+                    yield from batch.to_pylist()
+        else:
+            yield from self.retrieve_file(file_name, file_format)
+
+    def save_json(self, file_name, data):
+        """
+        Save data to a JSON file, skipping the generic format dispatch.
+
+        :param file_name: Name of the file to save
+        :param data: JSON-serializable data to be saved
+        """
+        self._hashes.pop((file_name, FileFormat.JSON), None)
+        if self.s3_config:
+            self._save_to_s3(file_name, orjson.dumps(data, option=JSON_DUMPS_OPTIONS), FileFormat.JSON)
+        else:
+            self._save_to_local(file_name, orjson.dumps(data, option=JSON_DUMPS_OPTIONS), FileFormat.JSON)
+
+    def retrieve_json(self, file_name):
+        """
+        Retrieve data from a JSON file, skipping the generic format dispatch.
+
+        :param file_name: Name of the file to retrieve
+        :return: Data from the file
+        """
+        if self.s3_config:
+            return orjson.loads(self._retrieve_from_s3(file_name, FileFormat.JSON))
+        return orjson.loads(self._retrieve_from_local(file_name, FileFormat.JSON))
+
+    def save_files(self, items):
+        """
+        Save several files.
+
+        With S3 the files are uploaded concurrently on a thread pool sharing this provider's
+        (thread-safe) S3 client; local files are written one after another.
+
+        :param items: Iterable of (file_name, data, file_format) tuples
+        """
+        self._run_batch(self.save_file, items)
+
+    def retrieve_files(self, items):
+        """
+        Retrieve several files.
+
+        With S3 the files are downloaded concurrently on a thread pool sharing this provider's
+        (thread-safe) S3 client; local files are read one after another.
+
+        :param items: Iterable of (file_name, file_format) tuples
+        :return: List with the data of each file, in the order of items
+        """
+        return self._run_batch(self.retrieve_file, items)
+
+    def _run_batch(self, method, items):
+        """
+        Call method once per argument tuple in items, concurrently when using S3.
+
+        :param method: Bound method to call
+        :param items: Iterable of argument tuples
+        :return: List of results, in the order of items
+        """
+        if not self.s3_config:
+            return [method(*item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+            return list(executor.map(lambda item: method(*item), items))
+
+    def _encode(self, file_name, data, file_format: FileFormat, schema=None):
+        """
+        Convert data to the content of a file: bytes for CSV and JSON, a pyarrow Table for Parquet.
+
+        :param file_name: Name of the file the data is saved to
+        :param data: Data to be saved
+        :param file_format: Format of the file (FileFormat enum)
+        :param schema: pyarrow Schema of the records (Parquet only), see save_file
+        :return: Content of the file
+        """
+        if file_format is FileFormat.PARQUET:
+            if schema is not None:
+                self._schemas[file_name] = schema
+                return self._data_to_parquet(data, schema)
+            remembered = self._schemas.get(file_name)
+            if remembered is not None:
+                try:
+                    return self._data_to_parquet(data, remembered)
+                except (ValueError, TypeError):
+                    # The records no longer fit the remembered schema (Arrow errors subclass these)
+                    self.forget_schema(file_name)
+            return self._data_to_parquet(data)
+        if schema is not None:
+            raise ValueError(f"Schemas are not supported for file format: {file_format}")
+        return getattr(self, _ENCODERS[file_format])(data)
 
-        if file_format == FileFormat.CSV:
-            return self._csv_to_data(content)
-        elif file_format == FileFormat.PARQUET:
-            return self._parquet_to_data(content)
-        elif file_format == FileFormat.JSON:
-            return self._json_to_data(content)
+    def _save_content(self, file_name, content, file_format: FileFormat):
+        """
+        Write encoded content to a file, on S3 or locally.
+
+        :param file_name: Name of the file to save
+        :param content: Content returned by _encode
+        :param file_format: Format of the file (FileFormat enum)
+        """
+        if self.s3_config:
+            self._save_to_s3(file_name, content, file_format)
+        else:
+            self._save_to_local(file_name, content, file_format)
 
     def _save_to_local(self, file_name, content, file_format: FileFormat):
         """
@@ -99,31 +450,34 @@ class FileProvider:
         :param content: Content to be saved
         :param file_format: Format of the file (FileFormat enum)
         """
-        self._validate_file_format(file_format)
-
-        file_path = os.path.join(self.local_directory, f"{file_name}.{file_format.name.lower()}")
-        if file_format == FileFormat.PARQUET:
-            content.to_parquet(file_path, index=False)
+        file_path = self._local_path(file_name, file_format)
+        if file_format is FileFormat.PARQUET:
+            pq.write_table(content, file_path, **PARQUET_WRITE_OPTIONS)
+            # Overwriting a Parquet file discards anything appended to it
+            parts_directory = self._local_parts_directory(file_name)
+            if os.path.isdir(parts_directory):
+                shutil.rmtree(parts_directory)
         else:
-            with open(file_path, 'w') as f:
+            with open(file_path, _LOCAL_WRITE_MODES[file_format]) as f:
                 f.write(content)
 
-    def _retrieve_from_local(self, file_name, file_format: FileFormat):
+    def _retrieve_from_local(self, file_name, file_format: FileFormat, columns=None, filters=None):
         """
         Retrieve content from a local file.
         
         :param file_name: Name of the file to retrieve
         :param file_format: Format of the file (FileFormat enum)
+        :param columns: Names of the columns to read (Parquet only)
+        :param filters: Row filters passed to pyarrow (Parquet only)
         :return: Content of the file
         """
-        self._validate_file_format(file_format)
-
-        file_path = os.path.join(self.local_directory, f"{file_name}.{file_format.name.lower()}")
-        if file_format == FileFormat.PARQUET:
-            return pd.read_parquet(file_path)
-        else:
-            with open(file_path, 'r') as f:
-                return f.read()
+        file_path = self._local_path(file_name, file_format)
+        if file_format is FileFormat.PARQUET:
+            paths = [file_path] + self._local_parquet_parts(file_name)
+            tables = [pq.read_table(path, columns=columns, filters=filters, memory_map=True) for path in paths]
+            return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+        with open(file_path, **_LOCAL_READ_OPTIONS[file_format]) as f:
+            return f.read()
 
     def _save_to_s3(self, file_name, content, file_format: FileFormat):
         """
@@ -133,67 +487,405 @@ class FileProvider:
         :param content: Content to be saved
         :param file_format: Format of the file (FileFormat enum)
         """
-        self._validate_file_format(file_format)
-
         try:
-            key = f"{self.s3_config['key']}/{file_name}.{file_format.name.lower()}"
-            if file_format == FileFormat.PARQUET:
-                buffer = content.to_parquet()
-                self.s3.put_object(Bucket=self.s3_config['bucket'], Key=key, Body=buffer)
+            key = self._s3_key(file_name, file_format)
+            if file_format is FileFormat.PARQUET:
+                self._upload_parquet(key, content)
+                if file_name in self._appended:
+                    # Overwriting a Parquet file discards anything appended to it
+                    self._delete_from_s3([part for part in self._s3_parquet_objects(file_name) if part != key])
             else:
-                self.s3.put_object(Bucket=self.s3_config['bucket'], Key=key, Body=content)
+                body = BytesIO(content)
+                self.s3.upload_fileobj(body, Bucket=self.s3_config['bucket'], Key=key, Config=S3_TRANSFER_CONFIG)
         except NoCredentialsError:
             raise Exception("S3 credentials not available")
 
-    def _retrieve_from_s3(self, file_name, file_format: FileFormat):
+    def _delete_from_s3(self, keys):
+        """
+        Delete S3 objects.
+
+        :param keys: Keys of the objects to delete
+        """
+        for start in range(0, len(keys), 1000):  # delete_objects takes at most 1000 keys
+            objects = [{'Key': key} for key in keys[start:start + 1000]]
+            self.s3.delete_objects(Bucket=self.s3_config['bucket'], Delete={'Objects': objects})
+
+    def _retrieve_from_s3(self, file_name, file_format: FileFormat, columns=None, filters=None):
         """
         Retrieve content from an S3 file.
         
         :param file_name: Name of the file to retrieve
         :param file_format: Format of the file (FileFormat enum)
+        :param columns: Names of the columns to read (Parquet only)
+        :param filters: Row filters passed to pyarrow (Parquet only)
         :return: Content of the file
         """
-        self._validate_file_format(file_format)
+        try:
+            key = self._s3_key(file_name, file_format)
+            if file_format is FileFormat.PARQUET:
+                keys = [key]
+                if file_name in self._appended:
+                    keys += self._s3_parquet_parts(file_name)
+                tables = [self._read_parquet_from_s3(part, columns, filters) for part in keys]
+                return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
 
+            buffer = self._download(key)
+            if file_format is FileFormat.JSON:
+                return buffer.getvalue()
+            else:
+                return buffer
+        except NoCredentialsError:
+            raise Exception("S3 credentials not available")
+
+    def _read_parquet_from_s3(self, key, columns=None, filters=None):
+        """
+        Read a Parquet object from S3 into a pyarrow Table.
+
+        :param key: S3 key of the object
+        :param columns: Names of the columns to read
+        :param filters: Row filters passed to pyarrow
+        :return: pyarrow Table
+        """
+        if (columns is not None or filters is not None) and not self.cache_directory:
+            # Only fetch the footer and the column chunks pyarrow actually needs
+            source = _S3ObjectFile(self.s3, self.s3_config['bucket'], key)
+        else:
+            source = pa.BufferReader(self._download(key).getbuffer())
+        return pq.read_table(source, columns=columns, filters=filters)
+
+    def _append_parquet_to_local(self, file_name, data, schema):
+        """
+        Write records as the next appended part of a local Parquet file, or as the file itself if it
+        does not exist yet.
+
+        :param file_name: Name of the file to append to
+        :param data: Records to be appended
+        :param schema: pyarrow Schema of the records, or None to use the schema of the existing file
+        """
+        file_path = self._local_path(file_name, FileFormat.PARQUET)
+        if not os.path.exists(file_path):
+            self._save_to_local(file_name, self._data_to_parquet(data, schema), FileFormat.PARQUET)
+            return
+
+        if schema is None:
+            content = self._data_to_file_schema(data, pq.read_schema(file_path))
+        else:
+            content = self._data_to_parquet(data, schema)
+        parts_directory = self._local_parts_directory(file_name)
+        os.makedirs(parts_directory, exist_ok=True)
+        part_path = os.path.join(parts_directory, f"{len(os.listdir(parts_directory)):06d}.parquet")
+        pq.write_table(content, part_path, **PARQUET_WRITE_OPTIONS)
+
+    def _append_parquet_to_s3(self, file_name, data, schema):
+        """
+        Write records as the next appended part of a Parquet file on S3, or as the file itself if it
+        does not exist yet.
+
+        :param file_name: Name of the file to append to
+        :param data: Records to be appended
+        :param schema: pyarrow Schema of the records, or None to use the schema of the existing file
+        """
         try:
-            key = f"{self.s3_config['key']}/{file_name}.{file_format.name.lower()}"
-            response = self.s3.get_object(Bucket=self.s3_config['bucket'], Key=key)
-            if file_format == FileFormat.PARQUET:
-                return pd.read_parquet(response['Body'])
+            key = self._s3_key(file_name, FileFormat.PARQUET)
+            objects = self._s3_parquet_objects(file_name)
+            self._appended.add(file_name)
+            if key not in objects:
+                self._save_to_s3(file_name, self._data_to_parquet(data, schema), FileFormat.PARQUET)
+                return
+
+            if schema is None:
+                file_schema = pq.read_schema(_S3ObjectFile(self.s3, self.s3_config['bucket'], key))
+                content = self._data_to_file_schema(data, file_schema)
             else:
-                return response['Body'].read().decode('utf-8')
+                content = self._data_to_parquet(data, schema)
+            parts_prefix = self._s3_parts_prefix(file_name, objects[key])
+            part_count = sum(1 for existing in objects if existing.startswith(parts_prefix))
+            self._upload_parquet(f"{parts_prefix}{part_count:06d}.parquet", content)
         except NoCredentialsError:
             raise Exception("S3 credentials not available")
 
+    def _upload_parquet(self, key, content):
+        """
+        Serialize a table to Parquet and upload it to S3.
+
+        :param key: S3 key to upload to
+        :param content: pyarrow Table to be uploaded
+        """
+        buffer = _thread_buffer()
+        pq.write_table(content, buffer, **PARQUET_WRITE_OPTIONS)
+        buffer.truncate()
+        buffer.seek(0)
+        self.s3.upload_fileobj(buffer, Bucket=self.s3_config['bucket'], Key=key, Config=S3_TRANSFER_CONFIG)
+
+    def _download(self, key):
+        """
+        Download an S3 object, through the local cache when one is configured.
+
+        :param key: S3 key of the object
+        :return: Buffer holding the object's content, positioned at the start
+        """
+        if self.cache_directory:
+            return self._download_cached(key)
+
+        buffer = BytesIO()
+        self.s3.download_fileobj(Bucket=self.s3_config['bucket'], Key=key, Fileobj=buffer, Config=S3_TRANSFER_CONFIG)
+        buffer.seek(0)
+        return buffer
+
+    def _download_cached(self, key):
+        """
+        Download an S3 object through the local cache.
+
+        The object's current ETag is fetched with a HEAD request; cache entries are named by a hash
+        of (bucket, key, ETag), so a changed object simply misses the cache and is downloaded again.
+        Misses are fetched with IfMatch on that ETag, so an entry never holds a newer version than
+        its name says. Stale entries are never evicted; prune the cache directory externally.
+
+        :param key: S3 key of the object
+        :return: Buffer holding the object's content
+        """
+        bucket = self.s3_config['bucket']
+        etag = self.s3.head_object(Bucket=bucket, Key=key)['ETag']
+        digest = hashlib.sha256(f"{bucket}/{key}/{etag}".encode('utf-8')).hexdigest()
+        cache_path = os.path.join(self.cache_directory, digest)
+
+        if not os.path.exists(cache_path):
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    # download_fileobj does not accept IfMatch, so stream a conditional GET instead
+                    body = self.s3.get_object(Bucket=bucket, Key=key, IfMatch=etag)['Body']
+                    shutil.copyfileobj(body, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+        with open(cache_path, 'rb') as f:
+            return BytesIO(f.read())
+
+    def _local_path(self, file_name, file_format: FileFormat):
+        """Return the local path of a file."""
+        return os.path.join(self.local_directory, f"{file_name}.{FILE_EXTENSIONS[file_format]}")
+
+    def _s3_key(self, file_name, file_format: FileFormat):
+        """Return the S3 key of a file."""
+        return f"{self.s3_config['key']}/{file_name}.{FILE_EXTENSIONS[file_format]}"
+
+    def _local_parts_directory(self, file_name):
+        """Return the local directory holding the appended parts of a Parquet file."""
+        return f"{self._local_path(file_name, FileFormat.PARQUET)}.parts"
+
+    def _local_parquet_parts(self, file_name):
+        """Return the paths of the appended parts of a local Parquet file, in append order."""
+        parts_directory = self._local_parts_directory(file_name)
+        if not os.path.isdir(parts_directory):
+            return []
+        return [os.path.join(parts_directory, part) for part in sorted(os.listdir(parts_directory))]
+
+    def _s3_parts_prefix(self, file_name, etag):
+        """
+        Return the S3 key prefix of the parts appended to a Parquet file.
+
+        Parts are grouped by the ETag of the file they were appended to, so parts left behind when
+        another provider overwrote the file are not read as part of the new one.
+        """
+        version = etag.strip('"')
+        return f"{self._s3_key(file_name, FileFormat.PARQUET)}.parts/{version}/"
+
+    def _s3_parquet_parts(self, file_name):
+        """Return the S3 keys of the parts appended to the current version of a Parquet file, in append order."""
+        objects = self._s3_parquet_objects(file_name)
+        etag = objects.get(self._s3_key(file_name, FileFormat.PARQUET))
+        if etag is None:
+            return []
+        parts_prefix = self._s3_parts_prefix(file_name, etag)
+        return sorted(key for key in objects if key.startswith(parts_prefix))
+
+    def _s3_parquet_objects(self, file_name):
+        """Return the ETags of a Parquet file on S3 and of all parts appended to it, by key, from a single listing."""
+        key = self._s3_key(file_name, FileFormat.PARQUET)
+        paginator = self.s3.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=self.s3_config['bucket'], Prefix=key)
+        return {obj['Key']: obj['ETag'] for page in pages for obj in page.get('Contents', [])
+                if obj['Key'] == key or obj['Key'].startswith(f"{key}.parts/")}
+
     def _validate_file_format(self, file_format: FileFormat):
         """
         Validate the file format.
         
         :param file_format: Format of the file (FileFormat enum)
         """
-        if not isinstance(file_format, FileFormat):
+        # Enums with members cannot be subclassed, so an exact class check is equivalent to isinstance
+        if file_format.__class__ is not FileFormat:
             raise ValueError(f"Invalid file format: {file_format}")
 
     def _data_to_csv(self, data):
-        """Convert data to CSV format."""
-        return pd.DataFrame(data).to_csv(index=False)
+        """Convert data to CSV format (UTF-8 encoded bytes)."""
+        if self.use_pandas or not isinstance(data, list):
+            return self._frame_to_csv(data)
+
+        try:
+            # Arrow infers and formats whole typed columns in C++
+            array = pa.array(data)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Columns mixing value types (or keys that are not str) cannot be typed by Arrow
+            return self._records_to_csv(data)
+        if not pa.types.is_struct(array.type):
+            # Not a list of records
+            return self._frame_to_csv(data)
+
+        table = pa.Table.from_struct_array(array)
+        # Arrow renders other types differently from str() (true vs True, 1 vs 1.0) or not at all
+        # (nested values), so only tables of integer and string columns take the Arrow path
+        if not all(_is_plain_csv_type(column_type) for column_type in table.schema.types):
+            return self._records_to_csv(data)
+        # Arrow writes a null as an empty field, which in a one-column file is a blank line that
+        # csv.DictReader skips; the csv module writes "" there instead
+        if table.num_columns == 1 and table.column(0).null_count:
+            return self._records_to_csv(data)
+
+        sink = pa.BufferOutputStream()
+        pacsv.write_csv(table, sink)
+        return sink.getvalue().to_pybytes()
+
+    def _records_to_csv(self, data):
+        """Convert a list of records to CSV format (UTF-8 encoded bytes) with the csv module."""
+        fieldnames = self._record_fieldnames(data)
+        if fieldnames is None:
+            return self._frame_to_csv(data)
+        buffer = StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(data)
+        return buffer.getvalue().encode('utf-8')
+
+    def _frame_to_csv(self, data):
+        """Convert data to CSV format (UTF-8 encoded bytes) through a pandas DataFrame."""
+        return pd.DataFrame(data).to_csv(index=False).encode('utf-8')
 
     def _csv_to_data(self, content):
-        """Convert CSV content to data."""
-        return pd.read_csv(content if isinstance(content, pd.DataFrame) else StringIO(content)).to_dict('records')
+        """Convert CSV content (str or binary file-like object) to data."""
+        if self.use_pandas:
+            return pd.read_csv(StringIO(content) if isinstance(content, str) else content).to_dict('records')
+
+        if isinstance(content, str):
+            return list(csv.DictReader(StringIO(content, newline='')))
+        return list(csv.DictReader(TextIOWrapper(content, encoding='utf-8', newline='')))
+
+    def _content_digest(self, data, content, file_format: FileFormat):
+        """
+        Hash the content of a file for change detection in update_file.
 
-    def _data_to_parquet(self, data):
-        """Convert data to Parquet format."""
-        return pd.DataFrame(data)
+        CSV and JSON content is hashed as the bytes that are written. A Parquet table is hashed as the
+        JSON serialization of the records plus the table's schema, so that records serializing alike
+        but stored differently (a datetime and its ISO string) are still a change.
+
+        :param data: Data being saved
+        :param content: Content returned by _encode
+        :param file_format: Format of the file (FileFormat enum)
+        :return: Hex digest, or None if the content cannot be hashed
+        """
+        if file_format is not FileFormat.PARQUET:
+            return hashlib.blake2b(content, digest_size=32).hexdigest()
+        try:
+            serialized = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return None
+        digest = hashlib.blake2b(serialized, digest_size=32)
+        digest.update(content.schema.to_string().encode('utf-8'))
+        return digest.hexdigest()
+
+    def _resolve_schema(self, file_name, schema):
+        """Remember a schema given for an append, or return the one remembered earlier (None if unknown)."""
+        if schema is None:
+            return self._schemas.get(file_name)
+        self._schemas[file_name] = schema
+        return schema
+
+    def _data_to_parquet(self, data, schema=None):
+        """Convert data to a pyarrow Table for Parquet output, inferring types unless a schema is given."""
+        if schema is None:
+            return self._records_to_table(data)
+        if not isinstance(data, list):
+            # DataFrames, dicts of lists and other inputs pandas accepts
+            frame = pd.DataFrame(data)
+            self._check_schema_fields(frame.columns, schema)
+            return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+        # Table.from_pylist silently drops keys missing from the schema; issuperset walks each
+        # record's keys in C, so the common case never loops over fields in Python
+        if not all(map(frozenset(schema.names).issuperset, data)):
+            fieldnames = self._record_fieldnames(data)
+            if fieldnames is None:
+                raise ValueError("Records must be dicts with str keys")
+            self._check_schema_fields(fieldnames, schema)
+        return pa.Table.from_pylist(data, schema=schema)
+
+    def _check_schema_fields(self, fieldnames, schema):
+        """Raise ValueError for field names missing from schema, which Arrow would silently drop."""
+        unknown = set(fieldnames).difference(schema.names)
+        if unknown:
+            raise ValueError(f"Records have fields not in the schema: {sorted(unknown)}")
+
+    def _record_fieldnames(self, data):
+        """
+        Return the union of the records' keys, in order of first appearance.
+
+        :return: List of field names, or None if data is not a list of dicts with str keys
+        """
+        fieldnames = {}
+        for record in data:
+            if not isinstance(record, dict):
+                return None
+            fieldnames.update(dict.fromkeys(record))
+        return list(fieldnames) if all(isinstance(name, str) for name in fieldnames) else None
+
+    def _records_to_table(self, data):
+        """
+        Convert data to a pyarrow Table with inferred types.
+
+        A list of records goes through a struct array inferred in C++, which has a field for every key
+        of any record (Table.from_pylist only uses the keys of the first record, silently dropping
+        keys that appear only in later ones). DataFrames, dicts of lists and other inputs pandas
+        accepts go through pd.DataFrame, as before.
+        """
+        if not isinstance(data, list):
+            return pa.Table.from_pandas(pd.DataFrame(data), preserve_index=False)
+        if not data:
+            return pa.table({})
+        return pa.Table.from_struct_array(pa.array(data))
+
+    def _data_to_file_schema(self, data, schema):
+        """
+        Convert records to a pyarrow Table with the schema of an existing Parquet file.
+
+        Types are inferred and then cast, which (unlike Table.from_pylist with a schema) raises on
+        lossy conversions such as 1.5 to an integer column. Fields missing from the records are null.
+
+        :param data: Records to be converted
+        :param schema: pyarrow Schema of the existing file
+        :return: pyarrow Table with that schema
+        :raises ValueError: if the records have fields or values that do not fit the schema
+        """
+        table = self._data_to_parquet(data)
+        unknown = set(table.column_names).difference(schema.names)
+        if unknown:
+            raise ValueError(f"Records have fields not in the schema of the file: {sorted(unknown)}")
+        try:
+            columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+                       else pa.chunked_array([pa.nulls(table.num_rows, field.type)]) for field in schema]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"Records do not fit the schema of the file: {e}") from e
+        return pa.Table.from_arrays(columns, schema=schema)
 
     def _parquet_to_data(self, content):
-        """Convert Parquet content to data."""
-        return content.to_dict('records')
+        """Convert a pyarrow Table read from Parquet to data."""
+        return content.to_pylist()
 
     def _data_to_json(self, data):
-        """Convert data to JSON format."""
-        return json.dumps(data)
+        """Convert data to JSON format (UTF-8 encoded bytes)."""
+        return orjson.dumps(data, option=JSON_DUMPS_OPTIONS)
 
     def _json_to_data(self, content):
-        """Convert JSON content to data."""
-        return json.loads(content)
\ No newline at end of file
+        """Convert JSON content (bytes or str) to data."""
+        return orjson.loads(content)
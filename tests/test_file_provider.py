@@ -2,14 +2,28 @@ import unittest
 from unittest.mock import patch, mock_open, MagicMock
 from botocore.exceptions import NoCredentialsError
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import io
-import json
+import os
+import tempfile
+from datetime import datetime
+import orjson
 from file_provider import FileProvider, FileFormat
+from file_provider import file_provider as file_provider_module
+from file_provider.file_provider import BATCH_MAX_WORKERS, PARQUET_WRITE_OPTIONS, S3_CLIENT_CONFIG, S3_TRANSFER_CONFIG
+
+def download_returning(data):
+    """Build a download_fileobj side effect that writes data into the target buffer."""
+    def download_fileobj(Bucket, Key, Fileobj, Config=None):
+        Fileobj.write(data)
+    return download_fileobj
 
 class TestFileProvider(unittest.TestCase):
 
     def setUp(self):
         self.local_provider = FileProvider(local_directory='test_data')
+        self.pandas_provider = FileProvider(local_directory='test_data', use_pandas=True)
         self.s3_config = {
             'bucket': 'test-bucket',
             'key': 'test-key',
@@ -20,6 +34,7 @@ class TestFileProvider(unittest.TestCase):
             mock_boto3.return_value = self.mock_s3
             self.s3_provider = FileProvider(s3_config=self.s3_config)
             self.s3_provider.s3 = self.mock_s3  # Ensure the mocked S3 client is set
+        file_provider_module._s3_clients.clear()  # Keep the mocked client out of the shared cache
 
     @patch('os.makedirs')
     def test_init(self, mock_makedirs):
@@ -29,28 +44,67 @@ class TestFileProvider(unittest.TestCase):
     @patch('boto3.client')
     def test_init_s3(self, mock_boto3_client):
         FileProvider(s3_config=self.s3_config)
-        mock_boto3_client.assert_called_once_with('s3', region_name='us-west-2')
+        mock_boto3_client.assert_called_once_with('s3', region_name='us-west-2', config=S3_CLIENT_CONFIG)
+
+    @patch('boto3.client')
+    def test_init_s3_shares_client_per_region(self, mock_boto3_client):
+        mock_boto3_client.side_effect = lambda *args, **kwargs: MagicMock()
+        first = FileProvider(s3_config=self.s3_config)
+        second = FileProvider(s3_config=self.s3_config)
+        other = FileProvider(s3_config={**self.s3_config, 'region': 'eu-west-1'})
+        self.assertIs(first.s3, second.s3)
+        self.assertIsNot(first.s3, other.s3)
+        self.assertEqual(mock_boto3_client.call_count, 2)
 
-    @patch('pandas.DataFrame.to_csv')
     @patch('builtins.open', new_callable=mock_open)
-    def test_save_file_local_csv(self, mock_file, mock_to_csv):
+    def test_save_file_local_csv(self, mock_file):
         data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
         self.local_provider.save_file('test', data, FileFormat.CSV)
-        mock_file.assert_called_once_with('test_data/test.csv', 'w')
+        mock_file.assert_called_once_with('test_data/test.csv', 'wb')
+        mock_file().write.assert_called_once_with(b'"name","age"\n"Alice",30\n"Bob",25\n')
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_file_local_csv_mixed_types(self, mock_file):
+        data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 'unknown', 'city': 'Oslo'}]
+        self.local_provider.save_file('test', data, FileFormat.CSV)
+        mock_file().write.assert_called_once_with(b'name,age,city\nAlice,30,\nBob,unknown,Oslo\n')
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_file_local_csv_non_plain_types(self, mock_file):
+        data = [{'name': 'Alice', 'score': 1.0, 'active': True, 'tags': {'team': 'a'}}]
+        self.local_provider.save_file('test', data, FileFormat.CSV)
+        mock_file().write.assert_called_once_with(b"name,score,active,tags\nAlice,1.0,True,{'team': 'a'}\n")
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_file_local_csv_non_record_inputs(self, mock_file):
+        for data in (pd.DataFrame({'name': ['Alice'], 'age': [30]}), {'name': ['Alice'], 'age': [30]}):
+            mock_file().write.reset_mock()
+            self.local_provider.save_file('test', data, FileFormat.CSV)
+            mock_file().write.assert_called_once_with(b'name,age\nAlice,30\n')
+        mock_file().write.reset_mock()
+        self.local_provider.save_file('test', [{1: 'a'}], FileFormat.CSV)
+        mock_file().write.assert_called_once_with(b'1\na\n')
+
+    @patch('pandas.DataFrame.to_csv')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_file_local_csv_pandas(self, mock_file, mock_to_csv):
+        data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
+        self.pandas_provider.save_file('test', data, FileFormat.CSV)
+        mock_file.assert_called_once_with('test_data/test.csv', 'wb')
         mock_to_csv.assert_called_once()
 
-    @patch('pandas.DataFrame.to_parquet')
-    def test_save_file_local_parquet(self, mock_to_parquet):
+    @patch('pyarrow.parquet.write_table')
+    def test_save_file_local_parquet(self, mock_write_table):
         data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
         self.local_provider.save_file('test', data, FileFormat.PARQUET)
-        mock_to_parquet.assert_called_once_with('test_data/test.parquet', index=False)
+        mock_write_table.assert_called_once_with(pa.Table.from_pylist(data), 'test_data/test.parquet', **PARQUET_WRITE_OPTIONS)
 
     @patch('builtins.open', new_callable=mock_open)
     def test_save_file_local_json(self, mock_file):
         data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
         self.local_provider.save_file('test', data, FileFormat.JSON)
-        mock_file.assert_called_once_with('test_data/test.json', 'w')
-        mock_file().write.assert_called_once_with(json.dumps(data))
+        mock_file.assert_called_once_with('test_data/test.json', 'wb')
+        mock_file().write.assert_called_once_with(orjson.dumps(data))
 
     @patch('boto3.client')
     def test_save_file_s3_csv(self, mock_boto3):
@@ -59,18 +113,32 @@ class TestFileProvider(unittest.TestCase):
         data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
         self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
         self.s3_provider.save_file('test', data, FileFormat.CSV)
-        mock_s3.put_object.assert_called_once()
+        mock_s3.upload_fileobj.assert_called_once()
 
     @patch('boto3.client')
     def test_save_file_s3_parquet(self, mock_boto3):
         mock_s3 = MagicMock()
         mock_boto3.return_value = mock_s3
-        mock_to_parquet = MagicMock()
-        mock_to_parquet.return_value = b'mocked parquet data'
         data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
         self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
         self.s3_provider.save_file('test', data, FileFormat.PARQUET)
-        mock_s3.put_object.assert_called_once()
+        mock_s3.upload_fileobj.assert_called_once()
+        body = mock_s3.upload_fileobj.call_args.args[0]
+        self.assertEqual(pq.read_table(body).to_pylist(), data)
+
+    @patch('boto3.client')
+    def test_save_file_s3_parquet_reuses_buffer(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        uploads = []
+        mock_s3.upload_fileobj.side_effect = lambda body, **kwargs: uploads.append((body, body.read()))
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        large = [{'name': 'x' * 100, 'age': i} for i in range(1000)]
+        small = [{'name': 'Alice', 'age': 30}]
+        self.s3_provider.save_file('large', large, FileFormat.PARQUET)
+        self.s3_provider.save_file('small', small, FileFormat.PARQUET)
+        self.assertIs(uploads[0][0], uploads[1][0])
+        self.assertEqual(pq.read_table(pa.BufferReader(uploads[1][1])).to_pylist(), small)
 
     @patch('boto3.client')
     def test_save_file_s3_json(self, mock_boto3):
@@ -79,51 +147,264 @@ class TestFileProvider(unittest.TestCase):
         data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
         self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
         self.s3_provider.save_file('test', data, FileFormat.JSON)
-        mock_s3.put_object.assert_called_once()
+        mock_s3.upload_fileobj.assert_called_once()
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_file_local_json_non_str_keys(self, mock_file):
+        self.local_provider.save_file('test', {1: 'a', 2: 'b'}, FileFormat.JSON)
+        mock_file().write.assert_called_once_with(b'{"1":"a","2":"b"}')
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_json_local(self, mock_file):
+        data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
+        self.local_provider.save_json('test', data)
+        mock_file.assert_called_once_with('test_data/test.json', 'wb')
+        mock_file().write.assert_called_once_with(orjson.dumps(data))
+
+    @patch('boto3.client')
+    def test_retrieve_json_s3(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.download_fileobj.side_effect = download_returning(b'[{"name": "Alice", "age": 30}]')
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        result = self.s3_provider.retrieve_json('test')
+        self.assertEqual(mock_s3.download_fileobj.call_args.kwargs['Key'], 'test-key/test.json')
+        self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
+
+    @patch.object(FileProvider, '_json_to_data', return_value=['patched'])
+    @patch('builtins.open', new_callable=mock_open, read_data=b'[]')
+    def test_retrieve_file_dispatches_through_instance(self, mock_file, mock_json_to_data):
+        self.assertEqual(self.local_provider.retrieve_file('test', FileFormat.JSON), ['patched'])
+        mock_json_to_data.assert_called_once_with(b'[]')
 
     def test_save_file_invalid_format(self):
         with self.assertRaises(ValueError):
             self.local_provider.save_file('test', [], 'invalid')
 
+    def test_update_file_invalid_format(self):
+        with self.assertRaises(ValueError):
+            self.local_provider.update_file('test', [], 'invalid')
+
+    @patch('boto3.client')
+    def test_update_file_skips_unchanged_data(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.update_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.JSON)
+        self.s3_provider.update_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.JSON)
+        self.assertEqual(mock_s3.upload_fileobj.call_count, 1)
+        self.s3_provider.update_file('test', [{'name': 'Alice', 'age': 31}], FileFormat.JSON)
+        self.assertEqual(mock_s3.upload_fileobj.call_count, 2)
+
+    @patch('boto3.client')
+    def test_update_file_csv_reordered_keys_uploads(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.update_file('test', [{'a': 1, 'b': 2}], FileFormat.CSV)
+        self.s3_provider.update_file('test', [{'b': 2, 'a': 1}], FileFormat.CSV)
+        self.assertEqual(mock_s3.upload_fileobj.call_count, 2)
+        self.assertEqual(mock_s3.upload_fileobj.call_args.args[0].read(), b'"b","a"\n2,1\n')
+
+    @patch('boto3.client')
+    def test_update_file_same_serialization_different_content_uploads(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        for file_format in (FileFormat.CSV, FileFormat.PARQUET):
+            mock_s3.upload_fileobj.reset_mock()
+            self.s3_provider.update_file('test', [{'d': datetime(2020, 1, 1)}], file_format)
+            self.s3_provider.update_file('test', [{'d': '2020-01-01T00:00:00'}], file_format)
+            self.assertEqual(mock_s3.upload_fileobj.call_count, 2)
+        self.s3_provider.update_file('test', [{'t': (1, 2)}], FileFormat.CSV)
+        self.s3_provider.update_file('test', [{'t': [1, 2]}], FileFormat.CSV)
+        self.assertEqual(mock_s3.upload_fileobj.call_args.args[0].read(), b't\n"[1, 2]"\n')
+
+    @patch('boto3.client')
+    def test_update_file_after_save_file_uploads(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.update_file('test', [{'name': 'Alice'}], FileFormat.JSON)
+        self.s3_provider.save_file('test', [{'name': 'Bob'}], FileFormat.JSON)
+        self.s3_provider.update_file('test', [{'name': 'Alice'}], FileFormat.JSON)
+        self.assertEqual(mock_s3.upload_fileobj.call_count, 3)
+
+    def test_update_file_append_local_parquet(self):
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET)
+            provider.update_file('test', [{'name': 'Bob', 'age': 25}], FileFormat.PARQUET, append=True)
+            provider.update_file('test', [{'name': 'Carol', 'age': 41}], FileFormat.PARQUET, append=True)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), [
+                {'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}, {'name': 'Carol', 'age': 41},
+            ])
+            provider.save_file('test', [{'name': 'Dave', 'age': 52}], FileFormat.PARQUET)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), [{'name': 'Dave', 'age': 52}])
+
+    def test_update_file_append_local_parquet_missing_file(self):
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.update_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET, append=True)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), [{'name': 'Alice', 'age': 30}])
+
+    def test_update_file_append_local_parquet_uses_file_schema(self):
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET)
+            provider.update_file('test', [{'name': 'Bob', 'age': None}], FileFormat.PARQUET, append=True)
+            provider.update_file('test', [{'name': 'Carol', 'age': 41.0}], FileFormat.PARQUET, append=True)
+            with self.assertRaises(ValueError):
+                provider.update_file('test', [{'name': 'Dave', 'age': 1.5}], FileFormat.PARQUET, append=True)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), [
+                {'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': None}, {'name': 'Carol', 'age': 41},
+            ])
+
+    @patch('boto3.client')
+    def test_update_file_append_s3_parquet(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        sink = pa.BufferOutputStream()
+        pq.write_table(pa.Table.from_pylist([{'name': 'Alice', 'age': 30}]), sink)
+        payload = sink.getvalue().to_pybytes()
+
+        def get_object(Bucket, Key, Range):
+            start, end = map(int, Range[len('bytes='):].split('-'))
+            return {'Body': io.BytesIO(payload[start:end + 1])}
+
+        mock_s3.head_object.return_value = {'ContentLength': len(payload)}
+        mock_s3.get_object.side_effect = get_object
+        mock_s3.get_paginator.return_value.paginate.return_value = [
+            {'Contents': [
+                {'Key': 'test-key/test.parquet', 'ETag': '"v2"'},
+                {'Key': 'test-key/test.parquet.parts/v1/000000.parquet', 'ETag': '"p0"'},
+                {'Key': 'test-key/test.parquet.parts/v2/000000.parquet', 'ETag': '"p1"'},
+            ]},
+        ]
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.update_file('test', [{'name': 'Bob', 'age': 25.0}], FileFormat.PARQUET, append=True)
+        mock_s3.upload_fileobj.assert_called_once()
+        self.assertEqual(mock_s3.upload_fileobj.call_args.kwargs['Key'], 'test-key/test.parquet.parts/v2/000001.parquet')
+        body = mock_s3.upload_fileobj.call_args.args[0]
+        self.assertEqual(pq.read_table(body).schema, pq.read_schema(pa.BufferReader(payload)))
+
+    @patch('boto3.client')
+    def test_update_file_append_s3_parquet_missing_file(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.get_paginator.return_value.paginate.return_value = [{}]
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.update_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET, append=True)
+        mock_s3.upload_fileobj.assert_called_once()
+        self.assertEqual(mock_s3.upload_fileobj.call_args.kwargs['Key'], 'test-key/test.parquet')
+
+    @patch('boto3.client')
+    def test_s3_parquet_parts_listed_only_after_append(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.download_fileobj.side_effect = download_returning(b'')
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.save_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET)
+        with patch('pyarrow.parquet.read_table', return_value=pa.table({'name': ['Alice']})):
+            self.s3_provider.retrieve_file('test', FileFormat.PARQUET)
+        mock_s3.get_paginator.assert_not_called()
+        mock_s3.delete_objects.assert_not_called()
+
+    def test_save_file_local_parquet_schema(self):
+        schema = pa.schema([('name', pa.string()), ('age', pa.int16())])
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET, schema=schema)
+            provider.update_file('test', [{'name': 'Bob', 'age': 25}], FileFormat.PARQUET, append=True)
+            # The appended part reuses the remembered schema instead of inferring int64
+            table = provider._retrieve_from_local('test', FileFormat.PARQUET)
+        self.assertEqual(table.schema, schema)
+        self.assertEqual(table.to_pylist(), [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}])
+
+    def test_save_file_local_parquet_without_schema_reinfers(self):
+        schema = pa.schema([('name', pa.string())])
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': 'Alice'}], FileFormat.PARQUET, schema=schema)
+            provider.save_file('test', [{'name': 'Bob', 'age': 25}], FileFormat.PARQUET)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), [{'name': 'Bob', 'age': 25}])
+
+    def test_save_file_local_parquet_reuses_remembered_schema(self):
+        schema = pa.schema([('name', pa.string()), ('age', pa.int16())])
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': 'Alice', 'age': 30}], FileFormat.PARQUET, schema=schema)
+            provider.save_file('test', [{'name': 'Bob', 'age': 25}], FileFormat.PARQUET)
+            self.assertEqual(provider._retrieve_from_local('test', FileFormat.PARQUET).schema, schema)
+            provider.forget_schema('test')
+            provider.save_file('test', [{'name': 'Bob', 'age': 25}], FileFormat.PARQUET)
+            self.assertEqual(provider._retrieve_from_local('test', FileFormat.PARQUET).schema.field('age').type, pa.int64())
+
+    def test_save_file_local_parquet_schema_unknown_field_raises(self):
+        schema = pa.schema([('name', pa.string())])
+        with self.assertRaises(ValueError):
+            self.local_provider.save_file('test', [{'name': 'Alice'}, {'name': 'Bob', 'age': 25}], FileFormat.PARQUET, schema=schema)
+
+    def test_update_file_append_unknown_field_raises(self):
+        schema = pa.schema([('name', pa.string())])
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': 'Alice'}], FileFormat.PARQUET, schema=schema)
+            with self.assertRaises(ValueError):
+                provider.update_file('test', [{'name': 'Bob', 'age': 25}], FileFormat.PARQUET, append=True)
+
+    def test_save_file_schema_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            self.local_provider.save_file('test', [], FileFormat.JSON, schema=pa.schema([]))
+
+    def test_update_file_append_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            self.local_provider.update_file('test', [], FileFormat.JSON, append=True)
+
+    @patch('builtins.open', new_callable=mock_open, read_data='name,age\nAlice,30\n')
+    def test_retrieve_file_local_csv(self, mock_file):
+        result = self.local_provider.retrieve_file('test', FileFormat.CSV)
+        mock_file.assert_called_once_with('test_data/test.csv', mode='r', encoding='utf-8', newline='')
+        self.assertEqual(result, [{'name': 'Alice', 'age': '30'}])
+
     @patch('pandas.read_csv')
     @patch('builtins.open', new_callable=mock_open)
-    def test_retrieve_file_local_csv(self, mock_file, mock_read_csv):
+    def test_retrieve_file_local_csv_pandas(self, mock_file, mock_read_csv):
         mock_read_csv.return_value = pd.DataFrame([{'name': 'Alice', 'age': 30}])
-        result = self.local_provider.retrieve_file('test', FileFormat.CSV)
-        mock_file.assert_called_once_with('test_data/test.csv', 'r')
+        result = self.pandas_provider.retrieve_file('test', FileFormat.CSV)
+        mock_file.assert_called_once_with('test_data/test.csv', mode='r', encoding='utf-8', newline='')
         self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
 
-    @patch('pandas.read_parquet')
-    def test_retrieve_file_local_parquet(self, mock_read_parquet):
-        mock_read_parquet.return_value = pd.DataFrame([{'name': 'Alice', 'age': 30}])
+    @patch('pyarrow.parquet.read_table')
+    def test_retrieve_file_local_parquet(self, mock_read_table):
+        mock_read_table.return_value = pa.Table.from_pylist([{'name': 'Alice', 'age': 30}])
         result = self.local_provider.retrieve_file('test', FileFormat.PARQUET)
-        mock_read_parquet.assert_called_once_with('test_data/test.parquet')
+        mock_read_table.assert_called_once_with('test_data/test.parquet', columns=None, filters=None, memory_map=True)
         self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
 
-    @patch('builtins.open', new_callable=mock_open, read_data='[{"name": "Alice", "age": 30}]')
+    @patch('builtins.open', new_callable=mock_open, read_data=b'[{"name": "Alice", "age": 30}]')
     def test_retrieve_file_local_json(self, mock_file):
         result = self.local_provider.retrieve_file('test', FileFormat.JSON)
-        mock_file.assert_called_once_with('test_data/test.json', 'r')
+        mock_file.assert_called_once_with('test_data/test.json', mode='rb')
         self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
 
     @patch('boto3.client')
     def test_retrieve_file_s3_csv(self, mock_boto3):
         mock_s3 = MagicMock()
         mock_boto3.return_value = mock_s3
-        mock_body = MagicMock()
-        mock_body.read.return_value = b'name,age\nAlice,30'
-        mock_s3.get_object.return_value = {'Body': mock_body}
+        mock_s3.download_fileobj.side_effect = download_returning(b'name,age\nAlice,30')
         self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
         result = self.s3_provider.retrieve_file('test', FileFormat.CSV)
-        self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
+        self.assertEqual(result, [{'name': 'Alice', 'age': '30'}])
 
     @patch('boto3.client')
-    @patch('pandas.read_parquet')
-    def test_retrieve_file_s3_parquet(self, mock_read_parquet, mock_boto3):
+    @patch('pyarrow.parquet.read_table')
+    def test_retrieve_file_s3_parquet(self, mock_read_table, mock_boto3):
         mock_s3 = MagicMock()
         mock_boto3.return_value = mock_s3
-        mock_read_parquet.return_value = pd.DataFrame([{'name': 'Alice', 'age': 30}])
-        mock_s3.get_object.return_value = {'Body': io.BytesIO()}
+        mock_read_table.return_value = pa.Table.from_pylist([{'name': 'Alice', 'age': 30}])
+        mock_s3.download_fileobj.side_effect = download_returning(b'')
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
         result = self.s3_provider.retrieve_file('test', FileFormat.PARQUET)
         self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
 
@@ -131,13 +412,165 @@ class TestFileProvider(unittest.TestCase):
     def test_retrieve_file_s3_json(self, mock_boto3):
         mock_s3 = MagicMock()
         mock_boto3.return_value = mock_s3
-        mock_body = MagicMock()
-        mock_body.read.return_value = b'[{"name": "Alice", "age": 30}]'
-        mock_s3.get_object.return_value = {'Body': mock_body}
+        mock_s3.download_fileobj.side_effect = download_returning(b'[{"name": "Alice", "age": 30}]')
         self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
         result = self.s3_provider.retrieve_file('test', FileFormat.JSON)
         self.assertEqual(result, [{'name': 'Alice', 'age': 30}])
 
+    @patch('builtins.open', new_callable=mock_open, read_data='name,age\nAlice,30\nBob,25\n')
+    def test_retrieve_file_iter_local_csv(self, mock_file):
+        result = list(self.local_provider.retrieve_file_iter('test', FileFormat.CSV))
+        mock_file.assert_called_once_with('test_data/test.csv', mode='r', encoding='utf-8', newline='')
+        self.assertEqual(result, [{'name': 'Alice', 'age': '30'}, {'name': 'Bob', 'age': '25'}])
+
+    @patch('pandas.read_csv')
+    def test_retrieve_file_iter_local_csv_pandas(self, mock_read_csv):
+        chunks = [pd.DataFrame([{'name': 'Alice', 'age': 30}]), pd.DataFrame([{'name': 'Bob', 'age': 25}])]
+        mock_read_csv.return_value.__iter__.return_value = iter(chunks)
+        result = list(self.pandas_provider.retrieve_file_iter('test', FileFormat.CSV, chunk_size=1))
+        mock_read_csv.assert_called_once_with('test_data/test.csv', chunksize=1, engine='c', memory_map=True)
+        self.assertEqual(result, [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}])
+
+    @patch('boto3.client')
+    def test_retrieve_file_iter_s3_csv(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.download_fileobj.side_effect = download_returning(b'name,age\nAlice,30\nBob,25')
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        result = list(self.s3_provider.retrieve_file_iter('test', FileFormat.CSV))
+        self.assertEqual(result, [{'name': 'Alice', 'age': '30'}, {'name': 'Bob', 'age': '25'}])
+
+    def test_retrieve_file_iter_invalid_format(self):
+        with self.assertRaises(ValueError):
+            self.local_provider.retrieve_file_iter('test', 'INVALID_FORMAT')
+
+    @patch('boto3.client')
+    def test_retrieve_file_s3_cached(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.head_object.return_value = {'ETag': '"v1"'}
+        mock_s3.get_object.return_value = {'Body': io.BytesIO(b'[{"name": "Alice", "age": 30}]')}
+        with tempfile.TemporaryDirectory() as cache_directory:
+            provider = FileProvider(s3_config=self.s3_config, cache_directory=cache_directory)
+            provider.s3 = mock_s3  # Set the mocked S3 client
+            first = provider.retrieve_file('test', FileFormat.JSON)
+            second = provider.retrieve_file('test', FileFormat.JSON)
+            self.assertEqual(len(os.listdir(cache_directory)), 1)
+        self.assertEqual(first, [{'name': 'Alice', 'age': 30}])
+        self.assertEqual(second, first)
+        self.assertEqual(mock_s3.head_object.call_count, 2)
+        mock_s3.get_object.assert_called_once_with(Bucket='test-bucket', Key='test-key/test.json', IfMatch='"v1"')
+        mock_s3.download_fileobj.assert_not_called()
+
+    @patch('boto3.client')
+    def test_retrieve_file_s3_cache_invalidated_by_etag(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.head_object.side_effect = [{'ETag': '"v1"'}, {'ETag': '"v2"'}]
+        payloads = iter([b'[{"name": "Alice"}]', b'[{"name": "Bob"}]'])
+        mock_s3.get_object.side_effect = lambda Bucket, Key, IfMatch: {'Body': io.BytesIO(next(payloads))}
+        with tempfile.TemporaryDirectory() as cache_directory:
+            provider = FileProvider(s3_config=self.s3_config, cache_directory=cache_directory)
+            provider.s3 = mock_s3  # Set the mocked S3 client
+            self.assertEqual(provider.retrieve_file('test', FileFormat.JSON), [{'name': 'Alice'}])
+            self.assertEqual(provider.retrieve_file('test', FileFormat.JSON), [{'name': 'Bob'}])
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_files_local(self, mock_file):
+        data = [{'name': 'Alice', 'age': 30}]
+        self.local_provider.save_files([('first', data, FileFormat.JSON), ('second', data, FileFormat.JSON)])
+        self.assertEqual(mock_file.call_count, 2)
+        mock_file.assert_any_call('test_data/first.json', 'wb')
+        mock_file.assert_any_call('test_data/second.json', 'wb')
+
+    @patch('boto3.client')
+    def test_save_files_s3(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        data = [{'name': 'Alice', 'age': 30}]
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        self.s3_provider.save_files([(f'test{i}', data, FileFormat.JSON) for i in range(5)])
+        self.assertEqual(mock_s3.upload_fileobj.call_count, 5)
+        keys = sorted(call.kwargs['Key'] for call in mock_s3.upload_fileobj.call_args_list)
+        self.assertEqual(keys, [f'test-key/test{i}.json' for i in range(5)])
+
+    def test_s3_pool_covers_batch_concurrency(self):
+        self.assertGreaterEqual(S3_CLIENT_CONFIG.max_pool_connections, BATCH_MAX_WORKERS * S3_TRANSFER_CONFIG.max_concurrency)
+
+    @patch('boto3.client')
+    def test_retrieve_files_s3(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        mock_s3.download_fileobj.side_effect = lambda Bucket, Key, Fileobj, Config=None: Fileobj.write(orjson.dumps([Key]))
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        result = self.s3_provider.retrieve_files([(f'test{i}', FileFormat.JSON) for i in range(5)])
+        self.assertEqual(result, [[f'test-key/test{i}.json'] for i in range(5)])
+
+    def test_save_file_local_parquet_heterogeneous_records(self):
+        data = [{'name': 'Alice'}, {'name': 'Bob', 'age': 25}]
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', data, FileFormat.PARQUET)
+            result = provider.retrieve_file('test', FileFormat.PARQUET)
+        self.assertEqual(result, [{'name': 'Alice', 'age': None}, {'name': 'Bob', 'age': 25}])
+
+    def test_save_file_local_parquet_frame_inputs(self):
+        expected = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]
+        columns = {'name': ['Alice', 'Bob'], 'age': [30, 25]}
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            for data in (pd.DataFrame(columns, index=[7, 8]), columns):
+                provider.save_file('test', data, FileFormat.PARQUET)
+                self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), expected)
+            provider.save_file('test', pd.DataFrame(columns), FileFormat.PARQUET, schema=pa.schema([('name', pa.string()), ('age', pa.int16())]))
+            self.assertEqual(provider.retrieve_file('test', FileFormat.PARQUET), expected)
+
+    def test_retrieve_file_local_csv_round_trip(self):
+        data = [{'name': 'Zoë', 'note': 'line one\nline two'}]
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', data, FileFormat.CSV)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.CSV), data)
+            self.assertEqual(list(provider.retrieve_file_iter('test', FileFormat.CSV)), data)
+
+    def test_retrieve_file_local_csv_round_trip_single_column_nulls(self):
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', [{'name': None}, {'name': 'Bob'}, {'name': None}], FileFormat.CSV)
+            self.assertEqual(provider.retrieve_file('test', FileFormat.CSV), [{'name': ''}, {'name': 'Bob'}, {'name': ''}])
+
+    def test_retrieve_file_local_parquet_pushdown(self):
+        data = [{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}, {'name': 'Carol', 'age': 41}]
+        with tempfile.TemporaryDirectory() as local_directory:
+            provider = FileProvider(local_directory=local_directory)
+            provider.save_file('test', data, FileFormat.PARQUET)
+            result = provider.retrieve_file('test', FileFormat.PARQUET, columns=['name'], filters=[('age', '>', 28)])
+        self.assertEqual(result, [{'name': 'Alice'}, {'name': 'Carol'}])
+
+    @patch('boto3.client')
+    def test_retrieve_file_s3_parquet_pushdown(self, mock_boto3):
+        mock_s3 = MagicMock()
+        mock_boto3.return_value = mock_s3
+        sink = pa.BufferOutputStream()
+        pq.write_table(pa.Table.from_pylist([{'name': 'Alice', 'age': 30}, {'name': 'Bob', 'age': 25}]), sink)
+        payload = sink.getvalue().to_pybytes()
+
+        def get_object(Bucket, Key, Range):
+            start, end = map(int, Range[len('bytes='):].split('-'))
+            return {'Body': io.BytesIO(payload[start:end + 1])}
+
+        mock_s3.head_object.return_value = {'ContentLength': len(payload)}
+        mock_s3.get_object.side_effect = get_object
+        mock_s3.get_paginator.return_value.paginate.return_value = []
+        self.s3_provider.s3 = mock_s3  # Set the mocked S3 client
+        result = self.s3_provider.retrieve_file('test', FileFormat.PARQUET, columns=['name'], filters=[('age', '<', 28)])
+        self.assertEqual(result, [{'name': 'Bob'}])
+        mock_s3.download_fileobj.assert_not_called()
+
+    def test_retrieve_file_pushdown_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            self.local_provider.retrieve_file('test', FileFormat.JSON, columns=['name'])
+
     def test_retrieve_file_invalid_format(self):
         with self.assertRaises(ValueError):
             self.local_provider.retrieve_file('test', 'INVALID_FORMAT')